@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
-import json
-import traceback
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
+import orjson
 from litestar import WebSocket, websocket, get
 
 from audio.pipeline import AudioPipeline
@@ -14,6 +18,109 @@ from audio.calibration import extract_profile
 MSG_CONTROL = 0x00
 MSG_AUDIO = 0x01
 
+# Max pending outbound event frames; the oldest is dropped when full
+OUTBOUND_QUEUE_SIZE = 256
+
+# Max audio chunks waiting for analysis before the receive loop stops reading
+AUDIO_BACKLOG_SIZE = 64
+
+# Min seconds between logged tracebacks of the same exception type
+ERROR_LOG_INTERVAL_S = 1.0
+
+logger = logging.getLogger(__name__)
+_last_error_log: dict[type, float] = {}
+
+
+def _log_exception(msg: str) -> None:
+    """Log the exception being handled, rate-limited per exception type."""
+    exc_type = sys.exc_info()[0]
+    now = time.monotonic()
+    last = _last_error_log.get(exc_type)
+    if last is not None and now - last < ERROR_LOG_INTERVAL_S:
+        return
+    _last_error_log[exc_type] = now
+    logger.exception(msg)
+
+
+def _dumps(obj: object) -> str:
+    """Serialize a server message for a text frame."""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+async def _drain(socket: WebSocket, queue: asyncio.Queue[str]) -> None:
+    """Writer task: send queued text frames in order."""
+    while True:
+        msg = await queue.get()
+        try:
+            await socket.send_data(msg, mode="text")
+        finally:
+            queue.task_done()
+
+
+def _enqueue(queue: asyncio.Queue[str], msg: str) -> None:
+    """Queue a frame without blocking the receive loop, dropping the oldest if full."""
+    try:
+        queue.put_nowait(msg)
+    except asyncio.QueueFull:
+        queue.get_nowait()
+        queue.task_done()
+        queue.put_nowait(msg)
+
+
+async def _flush(queue: asyncio.Queue, consumer: asyncio.Task) -> None:
+    """Wait until every queued item is handled (or the consumer task has died)."""
+    joined = asyncio.ensure_future(queue.join())
+    await asyncio.wait({joined, consumer}, return_when=asyncio.FIRST_COMPLETED)
+    joined.cancel()
+
+
+async def _put_or_raise(queue: asyncio.Queue, item: object, consumer: asyncio.Task) -> None:
+    """Queue an item for a consumer task, re-raising its error if it has died.
+
+    Waits for room if the queue is full, but stops waiting if the consumer
+    dies meanwhile, since nothing would ever drain the queue again.
+    """
+    if consumer.done():
+        consumer.result()
+    try:
+        queue.put_nowait(item)
+        return
+    except asyncio.QueueFull:
+        pass
+    put = asyncio.ensure_future(queue.put(item))
+    await asyncio.wait({put, consumer}, return_when=asyncio.FIRST_COMPLETED)
+    put.cancel()
+    if consumer.done():
+        consumer.result()
+
+
+async def _analyze(
+    pipeline: AudioPipeline,
+    worker: ThreadPoolExecutor,
+    audio_q: asyncio.Queue[np.ndarray],
+    out_q: asyncio.Queue[str],
+) -> None:
+    """Analysis task: run queued audio through the pipeline on the worker thread.
+
+    Chunks that arrive while the worker is busy are processed together as
+    one batch on the next call.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await audio_q.get()]
+        while not audio_q.empty():
+            batch.append(audio_q.get_nowait())
+        try:
+            events = await loop.run_in_executor(worker, pipeline.process_audio_batch, batch)
+        finally:
+            for _ in batch:
+                audio_q.task_done()
+        # Several events from one batch go out as a single JSON array frame
+        if len(events) == 1:
+            _enqueue(out_q, _dumps(events[0]))
+        elif events:
+            _enqueue(out_q, _dumps(events))
+
 
 @websocket("/ws/audio")
 async def audio_ws_handler(socket: WebSocket) -> None:
@@ -23,12 +130,30 @@ async def audio_ws_handler(socket: WebSocket) -> None:
         0x00 + JSON  →  control message (start / stop / calibrate / stop_calibration)
         0x01 + PCM   →  Float32 audio samples
       Server sends JSON text frames (events, report, calibration_result).
+      Multiple events produced together are sent as a JSON array.
     """
     await socket.accept()
     pipeline: AudioPipeline | None = None
 
+    # Event frames are sent by a separate writer task so a slow client
+    # never stalls the audio receive loop
+    out_q: asyncio.Queue[str] = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+    writer = asyncio.create_task(_drain(socket, out_q))
+
+    # Audio analysis (onset detection, spectral classification, calibration
+    # and report generation) runs on a per-connection worker thread so the
+    # event loop keeps receiving frames. A single worker keeps the pipeline
+    # calls in arrival order.
+    loop = asyncio.get_running_loop()
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-pipeline")
+
+    # Session audio is handed to an analysis task through a bounded queue,
+    # so a backlog builds up there and is processed in batches
+    audio_q: asyncio.Queue[np.ndarray] = asyncio.Queue(maxsize=AUDIO_BACKLOG_SIZE)
+    analyzer: asyncio.Task | None = None
+
     # Calibration state
-    cal_buffer: np.ndarray | None = None
+    cal_buffer: bytearray | None = None  # raw float32 PCM bytes
     cal_sample_rate: int = 44100
     cal_step: str | None = None  # "metronome" or "guitar"
 
@@ -40,28 +165,33 @@ async def audio_ws_handler(socket: WebSocket) -> None:
                 continue
 
             msg_type = data[0]
-            payload = data[1:]
+            # View past the type byte instead of slicing, which would copy the frame
+            payload = memoryview(data)[1:]
 
             if msg_type == MSG_CONTROL:
-                msg = json.loads(payload.decode())
+                msg = orjson.loads(payload)
                 print(f"[WS] control: {msg}")
 
                 if msg["type"] == "calibrate":
                     cal_step = msg.get("step", "metronome")
                     cal_sample_rate = msg.get("sample_rate", 44100)
-                    cal_buffer = np.array([], dtype=np.float32)
+                    cal_buffer = bytearray()
                     audio_msg_count = 0
                     await socket.send_data(
-                        json.dumps({"type": "calibration_started", "step": cal_step}),
+                        _dumps({"type": "calibration_started", "step": cal_step}),
                         mode="text",
                     )
 
                 elif msg["type"] == "stop_calibration":
-                    if cal_buffer is not None and len(cal_buffer) > 0:
+                    if cal_buffer:
                         try:
-                            profile = extract_profile(cal_buffer, cal_sample_rate)
+                            # Interpret the raw bytes as float32 once, at the end
+                            cal_audio = np.frombuffer(cal_buffer, dtype=np.float32)
+                            profile = await loop.run_in_executor(
+                                worker, extract_profile, cal_audio, cal_sample_rate
+                            )
                             await socket.send_data(
-                                json.dumps({
+                                _dumps({
                                     "type": "calibration_result",
                                     "step": cal_step,
                                     "profile": profile,
@@ -69,9 +199,9 @@ async def audio_ws_handler(socket: WebSocket) -> None:
                                 mode="text",
                             )
                         except Exception as e:
-                            traceback.print_exc()
+                            _log_exception("Calibration analysis failed")
                             await socket.send_data(
-                                json.dumps({
+                                _dumps({
                                     "type": "calibration_result",
                                     "step": cal_step,
                                     "error": f"Calibration analysis failed: {e}",
@@ -80,7 +210,7 @@ async def audio_ws_handler(socket: WebSocket) -> None:
                             )
                     else:
                         await socket.send_data(
-                            json.dumps({
+                            _dumps({
                                 "type": "calibration_result",
                                 "step": cal_step,
                                 "error": "No audio recorded during calibration",
@@ -92,26 +222,36 @@ async def audio_ws_handler(socket: WebSocket) -> None:
 
                 elif msg["type"] == "start":
                     audio_msg_count = 0
+                    if analyzer:
+                        analyzer.cancel()
+                        await asyncio.gather(analyzer, return_exceptions=True)
+                        audio_q = asyncio.Queue(maxsize=AUDIO_BACKLOG_SIZE)
                     pipeline = AudioPipeline(
                         grid_resolution=msg.get("grid", "8th"),
                         sample_rate=msg.get("sample_rate", 44100),
                         timing_threshold_ms=msg.get("threshold", 30.0),
                         calibration=msg.get("calibration"),
                     )
-                    await socket.send_data(json.dumps({"type": "started"}), mode="text")
+                    analyzer = asyncio.create_task(_analyze(pipeline, worker, audio_q, out_q))
+                    await socket.send_data(_dumps({"type": "started"}), mode="text")
 
                 elif msg["type"] == "stop":
-                    print(f"[WS] stop — received {audio_msg_count} audio messages, buffer={len(pipeline.audio_buffer) if pipeline else 'N/A'} samples")
+                    print(f"[WS] stop — received {audio_msg_count} audio messages, buffer={pipeline.total_samples if pipeline else 'N/A'} samples")
                     if pipeline:
+                        # Finish analyzing queued audio; re-raises if analysis failed
+                        await _flush(audio_q, analyzer)
+                        if analyzer.done():
+                            analyzer.result()
                         try:
-                            report = pipeline.generate_report()
+                            report = await loop.run_in_executor(worker, pipeline.generate_report)
                         except Exception as e:
-                            traceback.print_exc()
+                            _log_exception("Report generation failed")
                             report = {"type": "session_report", "error": f"Report generation failed: {e}"}
-                        await socket.send_data(json.dumps(report), mode="text")
+                        await _flush(out_q, writer)  # deliver pending events first
+                        await socket.send_data(_dumps(report), mode="text")
                     else:
                         await socket.send_data(
-                            json.dumps({"type": "session_report", "error": "No active session"}),
+                            _dumps({"type": "session_report", "error": "No active session"}),
                             mode="text",
                         )
                     break
@@ -120,36 +260,45 @@ async def audio_ws_handler(socket: WebSocket) -> None:
                 audio_msg_count += 1
                 if len(payload) % 4 != 0:
                     continue  # skip misaligned data
-                audio_chunk = np.frombuffer(payload, dtype=np.float32)
 
                 # Route audio to calibration buffer or session pipeline
                 if cal_buffer is not None:
-                    cal_buffer = np.concatenate([cal_buffer, audio_chunk])
+                    cal_buffer.extend(payload)
                     if audio_msg_count <= 3 or audio_msg_count % 100 == 0:
-                        duration = len(cal_buffer) / cal_sample_rate
+                        duration = len(cal_buffer) // 4 / cal_sample_rate
                         print(f"[WS] calibration audio #{audio_msg_count}: {duration:.1f}s buffered")
                 elif pipeline:
                     if audio_msg_count <= 3 or audio_msg_count % 100 == 0:
                         print(f"[WS] audio #{audio_msg_count}: {len(payload)}B payload, {len(payload)//4} samples")
-                    events = pipeline.process_audio(audio_chunk)
-                    for event in events:
-                        await socket.send_data(json.dumps(event), mode="text")
+                    # Raises here if analysis failed, ending the session
+                    await _put_or_raise(
+                        audio_q, np.frombuffer(payload, dtype=np.float32), analyzer
+                    )
 
             else:
                 if audio_msg_count == 0:
                     print(f"[WS] unhandled: type=0x{msg_type:02x}, {len(payload)}B, pipeline={'yes' if pipeline else 'no'}")
 
     except Exception as e:
-        traceback.print_exc()
+        _log_exception("WebSocket handler failed")
         # Try to send error report before closing
         try:
             await socket.send_data(
-                json.dumps({"type": "session_report", "error": f"Server error: {e}"}),
+                _dumps({"type": "session_report", "error": f"Server error: {e}"}),
                 mode="text",
             )
         except Exception:
             pass
     finally:
+        if pipeline:
+            # Close the streamed WAV if the client dropped; queued behind any
+            # pipeline call still running on the worker
+            worker.submit(pipeline.save_session)
+        worker.shutdown(wait=False)
+        writer.cancel()
+        if analyzer:
+            analyzer.cancel()
+        await asyncio.gather(writer, *([analyzer] if analyzer else []), return_exceptions=True)
         await socket.close()
 
 
@@ -1,10 +1,21 @@
 """Litestar application entry point."""
 
+import logging
+import logging.handlers
+import queue
+
 from litestar import Litestar
 from litestar.config.cors import CORSConfig
 
 from api.routes import audio_ws_handler, health_check
 
+# Log records are handed to a background thread so the audio WebSocket
+# never blocks on stderr writes
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(_log_queue)])
+
 cors_config = CORSConfig(
     allow_origins=["http://localhost:5173"],
     allow_methods=["*"],
@@ -14,9 +25,18 @@ cors_config = CORSConfig(
 app = Litestar(
     route_handlers=[audio_ws_handler, health_check],
     cors_config=cors_config,
+    on_shutdown=[_log_listener.stop],
 )
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        # PCM frames don't compress; per-message deflate only burns CPU
+        # inflating every incoming audio frame
+        ws_per_message_deflate=False,
+    )
@@ -7,12 +7,59 @@ Used in two contexts:
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+
 import numpy as np
 import librosa
+import scipy.fft
 
 
 # Window size in samples for feature extraction (~46ms at 44100Hz)
 WINDOW_SAMPLES = 2048
+N_MFCC = 13
+N_MELS = 128
+Q8_SCALE = 127  # int8 scale for quantized unit MFCC vectors
+
+# (sample_rate, n_fft) -> (mel_basis, dct_matrix, fft_freqs), built on first use
+_SPECTRAL_CACHE: dict[tuple[int, int], tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+# n_fft -> periodic Hann window (as used by librosa's STFT)
+_HANN: dict[int, np.ndarray] = {
+    n: librosa.filters.get_window("hann", n).astype(np.float32) for n in (2048, 1024, 512)
+}
+
+# spectral_fingerprint: start bins of 8 log-spaced bands (~43Hz to Nyquist) and
+# quantization steps. Steps are fine enough that windows sharing a fingerprint
+# get the same classify_onset verdict.
+_FINGERPRINT_BANDS = np.geomspace(2, WINDOW_SAMPLES // 2 + 1, 9).astype(np.int64)[:-1]
+FINGERPRINT_DB_STEP = 0.5
+FINGERPRINT_DECAY_STEP = 0.125  # octaves of second/first half energy ratio
+
+
+@dataclass(frozen=True)
+class CalibrationTemplates:
+    """Metronome and guitar profiles preprocessed for classify_onset."""
+
+    met_q8: np.ndarray  # int8 unit MFCC, widened to int32
+    gtr_q8: np.ndarray
+    met_decay: float
+    gtr_decay: float
+
+    @classmethod
+    def from_calibration(cls, calibration: dict | None) -> CalibrationTemplates | None:
+        """Parse a calibration dict; None unless both profiles are present."""
+        if not calibration:
+            return None
+        met_profile = calibration.get("metronome")
+        gtr_profile = calibration.get("guitar")
+        if not met_profile or not gtr_profile:
+            return None
+        return cls(
+            met_q8=_profile_q8_mfcc(met_profile),
+            gtr_q8=_profile_q8_mfcc(gtr_profile),
+            met_decay=met_profile.get("energy_decay", 0.5),
+            gtr_decay=gtr_profile.get("energy_decay", 0.5),
+        )
 
 
 def extract_profile(audio: np.ndarray, sample_rate: int) -> dict:
@@ -21,7 +68,9 @@ def extract_profile(audio: np.ndarray, sample_rate: int) -> dict:
     Runs offline onset detection, extracts a feature window around each onset,
     and averages the features across all detected onsets.
 
-    Returns dict with: mfcc_mean (13 floats), spectral_centroid, energy_decay, onset_count.
+    Returns dict with: mfcc_mean (13 floats), mfcc_mean_unit (mfcc_mean scaled to
+    unit length), mfcc_mean_q8 (mfcc_mean_unit quantized to int8), spectral_centroid,
+    energy_decay, onset_count.
     """
     onset_times = librosa.onset.onset_detect(
         y=audio, sr=sample_rate, hop_length=512, backtrack=False, units="time"
@@ -30,41 +79,40 @@ def extract_profile(audio: np.ndarray, sample_rate: int) -> dict:
     if len(onset_times) == 0:
         return {
             "mfcc_mean": [0.0] * 13,
+            "mfcc_mean_unit": [0.0] * 13,
+            "mfcc_mean_q8": [0] * 13,
             "spectral_centroid": 0.0,
             "energy_decay": 0.0,
             "onset_count": 0,
         }
 
-    all_mfcc = []
-    all_centroid = []
-    all_decay = []
-
-    for t in onset_times:
-        start = int(t * sample_rate)
-        end = start + WINDOW_SAMPLES
-        if end > len(audio):
-            continue
-
-        window = audio[start:end]
-        features = _extract_window_features(window, sample_rate)
-        if features is not None:
-            all_mfcc.append(features["mfcc"])
-            all_centroid.append(features["spectral_centroid"])
-            all_decay.append(features["energy_decay"])
+    # Gather every full-length onset window into one matrix
+    starts = (np.asarray(onset_times) * sample_rate).astype(np.int64)
+    starts = starts[starts + WINDOW_SAMPLES <= len(audio)]
+    windows = audio[starts[:, None] + np.arange(WINDOW_SAMPLES)]
 
-    if len(all_mfcc) == 0:
+    features = _batch_window_features(windows, sample_rate)
+    if features is None:
         return {
             "mfcc_mean": [0.0] * 13,
+            "mfcc_mean_unit": [0.0] * 13,
+            "mfcc_mean_q8": [0] * 13,
             "spectral_centroid": 0.0,
             "energy_decay": 0.0,
             "onset_count": 0,
         }
 
+    mfcc, centroid, decay = features
+    mfcc_mean = np.mean(mfcc, axis=0)
+    mfcc_unit = _unit_vector(mfcc_mean)
+
     return {
-        "mfcc_mean": np.mean(all_mfcc, axis=0).tolist(),
-        "spectral_centroid": float(np.mean(all_centroid)),
-        "energy_decay": float(np.mean(all_decay)),
-        "onset_count": len(all_mfcc),
+        "mfcc_mean": mfcc_mean.tolist(),
+        "mfcc_mean_unit": mfcc_unit.tolist(),
+        "mfcc_mean_q8": _quantize_unit(mfcc_unit).tolist(),
+        "spectral_centroid": float(np.mean(centroid)),
+        "energy_decay": float(np.mean(decay)),
+        "onset_count": len(decay),
     }
 
 
@@ -72,12 +120,17 @@ def classify_onset(
     audio_buffer: np.ndarray,
     onset_sample: int,
     sample_rate: int,
-    calibration: dict,
+    calibration: CalibrationTemplates | dict,
+    scratch: np.ndarray | None = None,
 ) -> str:
     """Classify a single onset as 'click' or 'guitar' using stored calibration profiles.
 
     Extracts features from the audio window at onset_sample and compares against
     the metronome and guitar profiles via cosine similarity on MFCCs.
+    calibration is either the raw calibration dict or, for callers that
+    classify many onsets, CalibrationTemplates parsed from it once.
+    scratch is an optional preallocated buffer (see new_feature_scratch) for
+    callers that classify many onsets.
 
     Returns 'click' or 'guitar'.
     """
@@ -85,30 +138,27 @@ def classify_onset(
     if end > len(audio_buffer) or onset_sample < 0:
         return "guitar"  # can't extract window, default to guitar
 
+    if isinstance(calibration, dict):
+        calibration = CalibrationTemplates.from_calibration(calibration)
+        if calibration is None:
+            return "guitar"
+
     window = audio_buffer[onset_sample:end]
-    features = _extract_window_features(window, sample_rate)
+    features = _batch_window_features(window[None, :], sample_rate, scratch)
     if features is None:
         return "guitar"
+    mfcc, _, decay = features
 
-    met_profile = calibration.get("metronome")
-    gtr_profile = calibration.get("guitar")
-    if not met_profile or not gtr_profile:
-        return "guitar"
-
-    onset_mfcc = np.array(features["mfcc"])
-    met_mfcc = np.array(met_profile["mfcc_mean"])
-    gtr_mfcc = np.array(gtr_profile["mfcc_mean"])
-
-    sim_met = _cosine_similarity(onset_mfcc, met_mfcc)
-    sim_gtr = _cosine_similarity(onset_mfcc, gtr_mfcc)
+    # Cosine similarity as an int8 dot product: profiles are stored
+    # pre-normalized and quantized, so only the onset vector needs it
+    onset_q8 = _quantize_unit(_unit_vector(mfcc[0])).astype(np.int32)
+    sim_met = int(onset_q8 @ calibration.met_q8) / Q8_SCALE**2
+    sim_gtr = int(onset_q8 @ calibration.gtr_q8) / Q8_SCALE**2
 
     # Also factor in energy decay — clicks decay much faster than guitar
-    met_decay = met_profile.get("energy_decay", 0.5)
-    gtr_decay = gtr_profile.get("energy_decay", 0.5)
-    onset_decay = features["energy_decay"]
-
-    decay_dist_met = abs(onset_decay - met_decay)
-    decay_dist_gtr = abs(onset_decay - gtr_decay)
+    onset_decay = float(decay[0])
+    decay_dist_met = abs(onset_decay - calibration.met_decay)
+    decay_dist_gtr = abs(onset_decay - calibration.gtr_decay)
 
     # Combined score: MFCC similarity (higher = more similar) minus decay distance
     score_met = sim_met - 0.3 * decay_dist_met
@@ -117,36 +167,144 @@ def classify_onset(
     return "click" if score_met > score_gtr else "guitar"
 
 
-def _extract_window_features(window: np.ndarray, sample_rate: int) -> dict | None:
-    """Extract spectral features from a single audio window."""
-    if np.max(np.abs(window)) < 1e-6:
-        return None  # silence
+def _spectral_constants(sample_rate: int, n_fft: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mel filterbank, DCT-II matrix and FFT bin frequencies for (sample_rate, n_fft)."""
+    key = (sample_rate, n_fft)
+    constants = _SPECTRAL_CACHE.get(key)
+    if constants is None:
+        mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=N_MELS)
+        dct = scipy.fft.dct(np.eye(N_MELS), type=2, norm="ortho", axis=0)[:N_MFCC]
+        freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+        constants = _SPECTRAL_CACHE[key] = (mel_basis, dct, freqs)
+    return constants
 
-    # MFCCs — 13 coefficients, averaged across time frames in the window
-    mfcc = librosa.feature.mfcc(y=window, sr=sample_rate, n_mfcc=13, n_fft=min(len(window), 2048))
-    mfcc_mean = np.mean(mfcc, axis=1)
 
-    # Spectral centroid
-    centroid = librosa.feature.spectral_centroid(y=window, sr=sample_rate, n_fft=min(len(window), 2048))
-    centroid_mean = float(np.mean(centroid))
+def spectral_fingerprint(window: np.ndarray) -> bytes:
+    """Quantized spectral signature of a WINDOW_SAMPLES onset window.
+
+    Share of each of 8 log-spaced band energies (in FINGERPRINT_DB_STEP dB)
+    plus the energy decay ratio (in FINGERPRINT_DECAY_STEP octaves), so the
+    signature is level-independent but tracks what classify_onset compares.
+    """
+    power = np.abs(scipy.fft.rfft(window * _HANN[WINDOW_SAMPLES])) ** 2
+    bands = np.add.reduceat(power, _FINGERPRINT_BANDS)
+    total = bands.sum()
+    if total <= 0:
+        return b""
+    share_db = 10.0 * np.log10(np.maximum(bands / total, 1e-10))
 
-    # Energy decay ratio (second half energy / first half energy)
     mid = len(window) // 2
-    first_energy = np.sum(window[:mid] ** 2)
-    second_energy = np.sum(window[mid:] ** 2)
-    decay = float(second_energy / first_energy) if first_energy > 1e-10 else 1.0
+    first = float(window[:mid] @ window[:mid])
+    second = float(window[mid:] @ window[mid:])
+    decay_oct = np.log2(max(second, 1e-20) / max(first, 1e-20))
 
-    return {
-        "mfcc": mfcc_mean.tolist(),
-        "spectral_centroid": centroid_mean,
-        "energy_decay": decay,
-    }
+    steps = np.append(share_db / FINGERPRINT_DB_STEP, decay_oct / FINGERPRINT_DECAY_STEP)
+    return np.round(steps).astype(np.int16).tobytes()
+
+
+def new_feature_scratch(n_windows: int = 1) -> np.ndarray:
+    """Zeroed buffer for classify_onset to pad windows into, instead of allocating per call."""
+    # Room for the window plus n_fft/2 zeros on each side (n_fft == WINDOW_SAMPLES)
+    return np.zeros((n_windows, 2 * WINDOW_SAMPLES), dtype=np.float32)
+
+
+def _batch_window_features(
+    windows: np.ndarray, sample_rate: int, scratch: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+    """Extract spectral features from a stack of equal-length windows.
 
+    Silent windows (RMS below 1e-6) are dropped. For the rest, computes one
+    centered STFT (hop n_fft/4) per window and derives both the MFCCs and the
+    spectral centroid from it, matching librosa.feature.mfcc and
+    librosa.feature.spectral_centroid with their default parameters.
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    """Cosine similarity between two vectors."""
-    norm_a = np.linalg.norm(a)
-    norm_b = np.linalg.norm(b)
-    if norm_a < 1e-10 or norm_b < 1e-10:
-        return 0.0
-    return float(np.dot(a, b) / (norm_a * norm_b))
+    Returns (mfcc_mean [n, 13], spectral_centroid [n], energy_decay [n]) for
+    the n non-silent windows, or None if every window is silent.
+
+    If given, scratch (rows >= n, zero outside the centre) holds the padded
+    windows so no padding buffer is allocated.
+    """
+    # Half-window energies serve both the silence check and the decay ratio
+    mid = windows.shape[1] // 2
+    first_energy = np.einsum("ij,ij->i", windows[:, :mid], windows[:, :mid])
+    second_energy = np.einsum("ij,ij->i", windows[:, mid:], windows[:, mid:])
+    voiced = first_energy + second_energy >= 1e-12 * windows.shape[1]
+    if not voiced.any():
+        return None
+    if not voiced.all():
+        windows = windows[voiced]
+        first_energy = first_energy[voiced]
+        second_energy = second_energy[voiced]
+
+    n_fft = min(windows.shape[1], 2048)
+    mel_basis, dct, freqs = _spectral_constants(sample_rate, n_fft)
+
+    pad = n_fft // 2
+    if scratch is not None:
+        padded = scratch[: len(windows)]
+        padded[:, pad : pad + windows.shape[1]] = windows
+    else:
+        padded = np.pad(windows, ((0, 0), (pad, pad)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft, axis=1)[:, :: n_fft // 4]
+    hann = _HANN.get(n_fft)
+    if hann is None:
+        hann = _HANN[n_fft] = librosa.filters.get_window("hann", n_fft).astype(np.float32)
+    magnitude = np.abs(scipy.fft.rfft(frames * hann, axis=-1))
+
+    # MFCCs — 13 coefficients, averaged across time frames in each window.
+    # dB conversion mirrors librosa.power_to_db (top_db=80 relative to each
+    # window's own peak).
+    mel = (magnitude**2) @ mel_basis.T
+    log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+    log_mel = np.maximum(log_mel, log_mel.max(axis=(1, 2), keepdims=True) - 80.0)
+    mfcc_mean = np.mean(log_mel @ dct.T, axis=1)
+
+    # Spectral centroid (silent frames contribute 0)
+    totals = magnitude.sum(axis=-1)
+    centroids = np.divide(
+        magnitude @ freqs, totals, out=np.zeros_like(totals), where=totals > 0
+    )
+    centroid_mean = np.mean(centroids, axis=1)
+
+    # Energy decay ratio (second half energy / first half energy)
+    decay = np.divide(
+        second_energy, first_energy,
+        out=np.ones_like(first_energy), where=first_energy > 1e-10,
+    )
+
+    return mfcc_mean, centroid_mean, decay
+
+
+def _unit_vector(v: np.ndarray) -> np.ndarray:
+    """Scale a vector to unit length (zero vectors stay zero)."""
+    norm = np.linalg.norm(v)
+    if norm < 1e-10:
+        return np.zeros_like(v, dtype=float)
+    return v / norm
+
+
+def _profile_unit_mfcc(profile: dict) -> np.ndarray:
+    """Unit-length MFCC of a calibration profile.
+
+    Profiles saved before mfcc_mean_unit existed only carry mfcc_mean.
+    """
+    unit = profile.get("mfcc_mean_unit")
+    if unit is None:
+        return _unit_vector(np.asarray(profile["mfcc_mean"]))
+    return np.asarray(unit)
+
+
+def _quantize_unit(v: np.ndarray) -> np.ndarray:
+    """Quantize a unit vector to int8 (components scaled by Q8_SCALE)."""
+    return np.round(v * Q8_SCALE).astype(np.int8)
+
+
+def _profile_q8_mfcc(profile: dict) -> np.ndarray:
+    """int8 unit MFCC of a calibration profile, widened to int32 for dot products.
+
+    Profiles saved before mfcc_mean_q8 existed are quantized on the fly.
+    """
+    q8 = profile.get("mfcc_mean_q8")
+    if q8 is None:
+        return _quantize_unit(_profile_unit_mfcc(profile)).astype(np.int32)
+    return np.asarray(q8, dtype=np.int32)
@@ -1,15 +1,40 @@
 """Grid alignment and timing deviation calculation."""
 
 import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _deviation(onset_time, reference_time, grid_interval, subdivisions_per_beat):
+    """Snap an onset to the grid. Returns unrounded
+    (deviation_ms, nearest_grid_time, bar, beat_position)."""
+    relative = onset_time - reference_time
+    grid_index = round(relative / grid_interval)
+    nearest_grid_time = reference_time + grid_index * grid_interval
+    deviation_ms = (onset_time - nearest_grid_time) * 1000.0
+
+    # Bar and beat position (4/4 time)
+    subdivisions_per_bar = 4 * subdivisions_per_beat
+    bar = grid_index // subdivisions_per_bar + 1
+    position_in_bar = grid_index % subdivisions_per_bar
+    beat_position = 1.0 + position_in_bar / subdivisions_per_beat
+
+    return deviation_ms, nearest_grid_time, bar, beat_position
 
 
 class GridConfig:
     """Beat grid based on BPM, resolution, and a reference time anchor."""
 
     def __init__(self, bpm: float, grid_resolution: str, reference_time: float):
-        self.bpm = bpm
         self.grid_resolution = grid_resolution  # "8th" or "16th"
+        self._subdivisions_per_beat = 4 if grid_resolution == "16th" else 2
+        self.update(bpm, reference_time)
+
+    def update(self, bpm: float, reference_time: float) -> None:
+        """Move the grid to a refined tempo/anchor in place."""
+        self.bpm = bpm
         self.reference_time = reference_time  # time of first beat (seconds)
+        self._grid_interval = 60.0 / bpm / self._subdivisions_per_beat
 
     @property
     def beat_duration(self) -> float:
@@ -17,9 +42,7 @@ class GridConfig:
 
     @property
     def grid_interval(self) -> float:
-        if self.grid_resolution == "16th":
-            return self.beat_duration / 4
-        return self.beat_duration / 2  # 8th notes
+        return self._grid_interval
 
     def compute_deviation(self, onset_time: float) -> tuple[float, float, int, float]:
         """
@@ -27,16 +50,7 @@ class GridConfig:
 
         Returns (deviation_ms, nearest_grid_time, bar, beat_position).
         """
-        relative = onset_time - self.reference_time
-        grid_index = round(relative / self.grid_interval)
-        nearest_grid_time = self.reference_time + grid_index * self.grid_interval
-        deviation_ms = (onset_time - nearest_grid_time) * 1000.0
-
-        # Bar and beat position (4/4 time)
-        subdivisions_per_beat = 4 if self.grid_resolution == "16th" else 2
-        subdivisions_per_bar = 4 * subdivisions_per_beat
-        bar = int(grid_index // subdivisions_per_bar) + 1
-        position_in_bar = grid_index % subdivisions_per_bar
-        beat_position = 1.0 + position_in_bar / subdivisions_per_beat
-
-        return round(deviation_ms, 1), nearest_grid_time, bar, round(beat_position, 2)
+        deviation_ms, nearest_grid_time, bar, beat_position = _deviation(
+            onset_time, self.reference_time, self._grid_interval, self._subdivisions_per_beat
+        )
+        return round(deviation_ms, 1), nearest_grid_time, int(bar), round(beat_position, 2)
@@ -7,7 +7,35 @@ grid via linear regression on accumulated click times to prevent drift.
 
 from __future__ import annotations
 
+from bisect import bisect_left
+
 import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _track(onset_time, reference, period, last_click):
+    """Grid-proximity test for a post-lock onset.
+
+    last_click is -inf if no click has been recorded yet.
+    Returns (is_click, nearest_beat_index).
+    """
+    offset = (onset_time - reference) / period
+    nearest_int = round(offset)
+    error_ms = abs(offset - nearest_int) * period * 1000.0
+
+    # Generous tolerance for click tracking (25% of grid period, max 50ms)
+    track_tolerance_ms = min(period * 250, 50.0)
+
+    if error_ms > track_tolerance_ms:
+        return False, nearest_int
+
+    # Reject if too close to the last click (prevents guitar notes near
+    # grid lines from being double-counted as clicks)
+    if onset_time - last_click < period * 0.5:
+        return False, nearest_int
+
+    return True, nearest_int
 
 
 class MetronomeDetector:
@@ -24,29 +52,45 @@ class MetronomeDetector:
     MAX_PERIOD_S = 1.5   # 40 BPM
     WINDOW_S = 6.0       # only look at last 6 seconds of onsets pre-lock
     REFIT_INTERVAL = 4   # refit grid every N new clicks
+    HISTOGRAM_BIN_S = 0.001     # IOI histogram resolution for period candidates
+    MAX_CANDIDATE_PERIODS = 10  # densest histogram bins to evaluate
+    _DIVISORS = np.array([1.0, 2.0, 3.0, 4.0])
+    CLICK_CAPACITY = 4096       # initial click storage, doubled when full
 
     def __init__(self):
-        self.onset_times: list[float] = []
+        self.onset_times: list[float] = []  # pre-lock onsets within WINDOW_S
+        self._total_onsets = 0
         self.locked = False
         self.bpm: float | None = None
         self.period: float | None = None
         self.reference_time: float | None = None
 
-        # Click tracking for grid refinement
-        self.click_times: list[float] = []
-        self._click_indices: list[int] = []
+        # Click tracking for grid refinement: the first _click_n entries of
+        # each array are valid, so undoing a click only lowers the watermark
+        self._click_times_arr = np.empty(self.CLICK_CAPACITY)
+        self._click_indices_arr = np.empty(self.CLICK_CAPACITY, dtype=np.int64)
+        self._click_n = 0
         self._clicks_since_refit = 0
 
+        # Running sums for the streaming time = reference + index * period fit
+        self._n = 0
+        self._sx = 0.0
+        self._sy = 0.0
+        self._sxy = 0.0
+        self._sxx = 0.0
+
         # Track best periodic count for frontend display
         self._best_periodic_count = 0
 
     def add_onset(self, time_seconds: float) -> bool:
         """Pre-lock: add any onset time. Returns True if grid just locked."""
-        self.onset_times.append(time_seconds)
+        self._total_onsets += 1
 
         if self.locked:
             return False
 
+        self.onset_times.append(time_seconds)
+
         if len(self.onset_times) < self.MIN_PERIODIC_ONSETS:
             return False
 
@@ -54,38 +98,37 @@ class MetronomeDetector:
 
     def _try_lock(self) -> bool:
         """Try to find a periodic subset among recent onsets."""
+        # Onsets arrive in time order, so everything before the window is a
+        # prefix of the list and will never be looked at again
         cutoff = self.onset_times[-1] - self.WINDOW_S
-        times = [t for t in self.onset_times if t >= cutoff]
+        stale = bisect_left(self.onset_times, cutoff)
+        if stale:
+            del self.onset_times[:stale]
+        times = self.onset_times
 
         if len(times) < self.MIN_PERIODIC_ONSETS:
             return False
 
+        t = np.asarray(times)
         best_period = None
-        best_aligned: list[float] = []
-
-        for i in range(len(times)):
-            for j in range(i + 1, len(times)):
-                raw_interval = times[j] - times[i]
-
-                for divisor in (1, 2, 3, 4):
-                    period = raw_interval / divisor
-                    if period < self.MIN_PERIOD_S or period > self.MAX_PERIOD_S:
-                        continue
+        best_aligned = t[:0]
 
-                    aligned = []
-                    for t in times:
-                        offset = (t - times[i]) / period
-                        nearest_int = round(offset)
-                        error_s = abs(offset - nearest_int) * period
-                        if error_s <= self.TOLERANCE_S:
-                            aligned.append(t)
+        # Row i holds every onset's time relative to anchor onset i
+        relative = t[None, :] - t[:, None]
 
-                    if len(aligned) > len(best_aligned):
-                        best_aligned = aligned
-                        best_period = period
+        for period in self._candidate_periods(t):
+            offsets = relative * (1.0 / period)
+            aligned_mask = np.abs(offsets - np.round(offsets)) * period <= self.TOLERANCE_S
+            counts = aligned_mask.sum(axis=1)
+            anchor = int(counts.argmax())
 
-            if len(best_aligned) >= 6:
-                break
+            # On a tie prefer the longer period: a subdivision of the beat
+            # aligns the same clicks and only wins if it aligns strictly more
+            if counts[anchor] > len(best_aligned) or (
+                counts[anchor] == len(best_aligned) and period > best_period
+            ):
+                best_aligned = t[aligned_mask[anchor]]
+                best_period = period
 
         self._best_periodic_count = len(best_aligned)
 
@@ -99,46 +142,88 @@ class MetronomeDetector:
             )
 
         if len(best_aligned) >= self.MIN_PERIODIC_ONSETS and best_period is not None:
-            self.click_times = sorted(best_aligned)
+            n = len(best_aligned)
+            self._click_times_arr[:n] = np.sort(best_aligned)
+            self._click_n = n
 
             # Use linear regression for initial period/reference estimate.
             # This is more accurate than median IOI, especially when one of
             # the aligned onsets is a noise false positive.
             self._compute_click_indices(best_period)
+            x = self._click_indices.astype(float)
+            y = self.click_times
+            self._n = len(x)
+            self._sx = float(x.sum())
+            self._sy = float(y.sum())
+            self._sxy = float(x @ y)
+            self._sxx = float(x @ x)
             self._refit()
 
+            if self.period is None:
+                # The fitted period fell outside the tempo range; keep searching
+                self._click_n = 0
+                self._n = 0
+                self._sx = self._sy = self._sxy = self._sxx = 0.0
+                return False
+
             self.locked = True
+            self.onset_times = []  # only needed for the pre-lock search
             print(
                 f"[MetronomeDetector] LOCKED: bpm={self.bpm:.1f}, "
                 f"period={self.period*1000:.2f}ms, "
-                f"clicks={len(self.click_times)}, "
+                f"clicks={self._click_n}, "
                 f"ref={self.reference_time:.3f}s"
             )
             return True
 
         return False
 
+    def _candidate_periods(self, t: np.ndarray) -> np.ndarray:
+        """Most common beat periods implied by the pairwise inter-onset intervals.
+
+        Every positive IOI (and its 1/2, 1/3, 1/4 subdivisions) in the period
+        range votes into a 1ms histogram; the densest bins are returned as
+        candidate periods, each the mean of the votes in its bin.
+        """
+        iois = (t[None, :] - t[:, None]).ravel()
+        iois = iois[(iois >= self.MIN_PERIOD_S) & (iois <= self.MAX_PERIOD_S * 4)]
+        cands = (iois[:, None] / self._DIVISORS).ravel()
+        cands = cands[(cands >= self.MIN_PERIOD_S) & (cands <= self.MAX_PERIOD_S)]
+        if len(cands) == 0:
+            return cands
+
+        n_bins = int(round((self.MAX_PERIOD_S - self.MIN_PERIOD_S) / self.HISTOGRAM_BIN_S))
+        bins = np.minimum(
+            ((cands - self.MIN_PERIOD_S) / self.HISTOGRAM_BIN_S).astype(np.int64), n_bins - 1
+        )
+        counts = np.bincount(bins, minlength=n_bins)
+        sums = np.bincount(bins, weights=cands, minlength=n_bins)
+
+        top = np.argsort(counts, kind="stable")[::-1][: self.MAX_CANDIDATE_PERIODS]
+        top = top[counts[top] > 0]
+        return sums[top] / counts[top]
+
     def _compute_click_indices(self, approx_period: float) -> None:
         """Assign beat indices to click_times based on approximate period."""
-        if not self.click_times:
+        if not self._click_n:
             return
-        base = self.click_times[0]
-        self._click_indices = [
-            round((t - base) / approx_period) for t in self.click_times
-        ]
+        times = self.click_times
+        self._click_indices_arr[: self._click_n] = np.round((times - times[0]) / approx_period)
 
     def _refit(self) -> None:
-        """Recompute period and reference from all accumulated click times via linear regression."""
-        if len(self.click_times) < 2:
-            return
+        """Recompute period and reference from all accumulated click times via linear regression.
 
-        indices = np.array(self._click_indices, dtype=float)
-        times = np.array(self.click_times)
+        Uses the running sums maintained by _accumulate, so each refit is O(1)
+        regardless of session length.
+        """
+        n = self._n
+        denom = n * self._sxx - self._sx * self._sx
+        if n < 2 or denom <= 0:
+            return
 
-        # Fit: time = reference + index * period
-        A = np.vstack([indices, np.ones(len(indices))]).T
-        result, _, _, _ = np.linalg.lstsq(A, times, rcond=None)
-        new_period, new_reference = result
+        # Fit: time = reference + index * period (closed-form least squares)
+        new_period = (n * self._sxy - self._sx * self._sy) / denom
+        new_reference = (self._sy - new_period * self._sx) / n
 
         if self.MIN_PERIOD_S <= new_period <= self.MAX_PERIOD_S:
             old_period = self.period
@@ -149,9 +234,17 @@ class MetronomeDetector:
                 print(
                     f"[MetronomeDetector] REFIT: period {old_period*1000:.2f}"
                     f"→{new_period*1000:.2f}ms, bpm={self.bpm:.1f}, "
-                    f"clicks={len(self.click_times)}"
+                    f"clicks={self._click_n}"
                 )
 
+    def _accumulate(self, index: int, time_seconds: float, weight: int = 1) -> None:
+        """Add (weight=1) or remove (weight=-1) one click from the regression sums."""
+        self._n += weight
+        self._sx += weight * index
+        self._sy += weight * time_seconds
+        self._sxy += weight * index * time_seconds
+        self._sxx += weight * index * index
+
     def track_onset(self, onset_time: float) -> bool:
         """Post-lock: check if onset is a metronome click and refine grid.
 
@@ -163,26 +256,24 @@ class MetronomeDetector:
         if not self.locked or self.period is None or self.reference_time is None:
             return False
 
-        offset = (onset_time - self.reference_time) / self.period
-        nearest_int = round(offset)
-        error_ms = abs(offset - nearest_int) * self.period * 1000.0
-
-        # Generous tolerance for click tracking (25% of grid period, max 50ms)
-        track_tolerance_ms = min(self.period * 250, 50.0)
-
-        if error_ms > track_tolerance_ms:
+        is_click, nearest_int = _track(
+            onset_time,
+            self.reference_time,
+            self.period,
+            self._click_times_arr[self._click_n - 1] if self._click_n else -np.inf,
+        )
+        if not is_click:
             return False
 
-        # Reject if too close to the last click (prevents guitar notes near
-        # grid lines from being double-counted as clicks)
-        if self.click_times:
-            gap = onset_time - self.click_times[-1]
-            if gap < self.period * 0.5:
-                return False
-
         # This onset is a click — record it and refine grid
-        self.click_times.append(onset_time)
-        self._click_indices.append(int(nearest_int))
+        n = self._click_n
+        if n == len(self._click_times_arr):
+            self._click_times_arr = np.resize(self._click_times_arr, 2 * n)
+            self._click_indices_arr = np.resize(self._click_indices_arr, 2 * n)
+        self._click_times_arr[n] = onset_time
+        self._click_indices_arr[n] = nearest_int
+        self._click_n = n + 1
+        self._accumulate(int(nearest_int), onset_time)
         self._clicks_since_refit += 1
 
         if self._clicks_since_refit >= self.REFIT_INTERVAL:
@@ -191,18 +282,45 @@ class MetronomeDetector:
 
         return True
 
+    def undo_last_click(self) -> bool:
+        """Forget the most recent tracked click (e.g. it turned out to be a note).
+
+        Removes it from the click storage and the regression sums. A refit
+        it already triggered is kept. Returns False if there is no click.
+        """
+        n = self._click_n - 1
+        if n < 0:
+            return False
+        self._click_n = n
+        self._accumulate(
+            int(self._click_indices_arr[n]), float(self._click_times_arr[n]), weight=-1
+        )
+        if self._clicks_since_refit > 0:
+            self._clicks_since_refit -= 1
+        return True
+
+    @property
+    def click_times(self) -> np.ndarray:
+        """Times of the tracked clicks (a view; valid until the next click)."""
+        return self._click_times_arr[: self._click_n]
+
+    @property
+    def _click_indices(self) -> np.ndarray:
+        """Beat index of each tracked click (a view, parallel to click_times)."""
+        return self._click_indices_arr[: self._click_n]
+
     @property
     def total_onsets(self) -> int:
-        return len(self.onset_times)
+        return self._total_onsets
 
     @property
     def click_count(self) -> int:
         """Best periodic onset count found so far (even before lock)."""
         if self.locked:
-            return len(self.click_times)
+            return self._click_n
         return self._best_periodic_count
 
     @property
     def grid_updated(self) -> bool:
         """True if the grid was just refined (period/reference changed)."""
-        return self._clicks_since_refit == 0 and len(self.click_times) > self.MIN_PERIODIC_ONSETS
+        return self._clicks_since_refit == 0 and self._click_n > self.MIN_PERIODIC_ONSETS
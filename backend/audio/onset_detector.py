@@ -4,6 +4,69 @@ from __future__ import annotations
 
 import numpy as np
 import librosa
+from numba import njit
+
+
+@njit(cache=True)
+def _onset_kernel(
+    rms,
+    start_sample,
+    hop_size,
+    sample_rate,
+    smoothed_rms,
+    mean_rms,
+    above_threshold,
+    last_onset_time,
+    peak_rms,
+    alpha_smooth,
+    alpha_mean_rise,
+    alpha_mean_fall,
+    threshold_ratio,
+    min_threshold,
+    hysteresis_ratio,
+    min_interval_seconds,
+):
+    """Run the adaptive threshold state machine over per-frame RMS values.
+
+    Returns (onset_times, smoothed_rms, mean_rms, above_threshold,
+    last_onset_time, peak_rms). last_onset_time is -inf if no onset has
+    been seen yet.
+    """
+    onsets = np.empty(len(rms), dtype=np.float64)
+    n_onsets = 0
+
+    for k in range(len(rms)):
+        r = float(rms[k])
+        smoothed_rms = alpha_smooth * r + (1 - alpha_smooth) * smoothed_rms
+        threshold = max(min_threshold, mean_rms * threshold_ratio)
+
+        # Track peak for diagnostics
+        if r > peak_rms:
+            peak_rms = r
+
+        if smoothed_rms > threshold:
+            if not above_threshold:
+                # Rising edge: energy just crossed threshold — this is an onset
+                above_threshold = True
+                onset_time = (start_sample + k * hop_size) / sample_rate
+                if onset_time - last_onset_time >= min_interval_seconds:
+                    onsets[n_onsets] = onset_time
+                    n_onsets += 1
+                    last_onset_time = onset_time
+        else:
+            # Hysteresis: only re-arm when energy drops well below threshold.
+            # This prevents double-triggering on guitar notes where energy
+            # briefly dips during the attack→sustain transition.
+            if smoothed_rms < threshold * hysteresis_ratio:
+                above_threshold = False
+
+        # Asymmetric baseline: rises slowly during loud signals,
+        # falls faster after energy fades — keeps detector sensitive
+        # to quieter events (metronome clicks) after loud guitar notes
+        alpha = alpha_mean_rise if r > mean_rms else alpha_mean_fall
+        mean_rms = alpha * r + (1 - alpha) * mean_rms
+
+    return onsets[:n_onsets], smoothed_rms, mean_rms, above_threshold, last_onset_time, peak_rms
 
 
 class RealtimeOnsetDetector:
@@ -38,60 +101,61 @@ class RealtimeOnsetDetector:
 
     def process_chunk(self, audio_chunk: np.ndarray) -> list[float]:
         """Process a chunk and return detected onset times (seconds)."""
-        onsets: list[float] = []
         frame_size = 512
         hop_size = 256
 
-        for i in range(0, len(audio_chunk) - frame_size + 1, hop_size):
-            frame = audio_chunk[i : i + frame_size]
-            rms = float(np.sqrt(np.mean(frame**2)))
-
-            self.smoothed_rms = (
-                self.alpha_smooth * rms + (1 - self.alpha_smooth) * self.smoothed_rms
-            )
-
+        if len(audio_chunk) < frame_size:
+            self.total_samples += len(audio_chunk)
+            return []
+
+        # Frame the chunk without copying and compute every frame's RMS at once
+        frames = np.lib.stride_tricks.sliding_window_view(audio_chunk, frame_size)[::hop_size]
+        rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_size)
+
+        # The IIR smoothing and hysteresis gate are sequential, so they run
+        # in a compiled kernel over the per-frame RMS vector
+        (
+            onset_times,
+            self.smoothed_rms,
+            self.mean_rms,
+            self._above_threshold,
+            last_onset_time,
+            self._peak_rms,
+        ) = _onset_kernel(
+            rms,
+            self.total_samples,
+            hop_size,
+            self.sample_rate,
+            self.smoothed_rms,
+            self.mean_rms,
+            self._above_threshold,
+            -np.inf if self.last_onset_time is None else self.last_onset_time,
+            self._peak_rms,
+            self.alpha_smooth,
+            self.alpha_mean_rise,
+            self.alpha_mean_fall,
+            self.threshold_ratio,
+            self.min_threshold,
+            self.hysteresis_ratio,
+            self.min_interval_seconds,
+        )
+        if np.isfinite(last_onset_time):
+            self.last_onset_time = float(last_onset_time)
+
+        # Periodic diagnostic logging
+        prev_frame_count = self._frame_count
+        self._frame_count += len(rms)
+        if self._frame_count // self._log_interval > prev_frame_count // self._log_interval:
+            t = (self.total_samples + (len(rms) - 1) * hop_size) / self.sample_rate
             threshold = max(self.min_threshold, self.mean_rms * self.threshold_ratio)
-
-            # Track peak for diagnostics
-            if rms > self._peak_rms:
-                self._peak_rms = rms
-
-            if self.smoothed_rms > threshold:
-                if not self._above_threshold:
-                    # Rising edge: energy just crossed threshold — this is an onset
-                    self._above_threshold = True
-                    onset_time = (self.total_samples + i) / self.sample_rate
-                    if (
-                        self.last_onset_time is None
-                        or onset_time - self.last_onset_time >= self.min_interval_seconds
-                    ):
-                        onsets.append(onset_time)
-                        self.last_onset_time = onset_time
-            else:
-                # Hysteresis: only re-arm when energy drops well below threshold.
-                # This prevents double-triggering on guitar notes where energy
-                # briefly dips during the attack→sustain transition.
-                if self.smoothed_rms < threshold * self.hysteresis_ratio:
-                    self._above_threshold = False
-
-            # Asymmetric baseline: rises slowly during loud signals,
-            # falls faster after energy fades — keeps detector sensitive
-            # to quieter events (metronome clicks) after loud guitar notes
-            alpha = self.alpha_mean_rise if rms > self.mean_rms else self.alpha_mean_fall
-            self.mean_rms = alpha * rms + (1 - alpha) * self.mean_rms
-
-            # Periodic diagnostic logging
-            self._frame_count += 1
-            if self._frame_count % self._log_interval == 0:
-                t = (self.total_samples + i) / self.sample_rate
-                print(
-                    f"[OnsetDetector] t={t:.1f}s  rms={rms:.5f}  "
-                    f"smoothed={self.smoothed_rms:.5f}  mean={self.mean_rms:.5f}  "
-                    f"threshold={threshold:.5f}  peak={self._peak_rms:.5f}"
-                )
+            print(
+                f"[OnsetDetector] t={t:.1f}s  rms={rms[-1]:.5f}  "
+                f"smoothed={self.smoothed_rms:.5f}  mean={self.mean_rms:.5f}  "
+                f"threshold={threshold:.5f}  peak={self._peak_rms:.5f}"
+            )
 
         self.total_samples += len(audio_chunk)
-        return onsets
+        return onset_times.tolist()
 
     def reset(self) -> None:
         self.last_onset_time = None
@@ -103,8 +167,19 @@ class RealtimeOnsetDetector:
         self._frame_count = 0
 
 
-def detect_onsets_offline(audio: np.ndarray, sample_rate: int = 44100) -> np.ndarray:
-    """Run librosa onset detection on a complete audio buffer. Returns times in seconds."""
+def detect_onsets_offline(
+    audio: np.ndarray,
+    sample_rate: int = 44100,
+    precomputed_onsets: np.ndarray | None = None,
+) -> np.ndarray:
+    """Run librosa onset detection on a complete audio buffer. Returns times in seconds.
+
+    If precomputed_onsets is given (e.g. the onsets a RealtimeOnsetDetector
+    already found during a live session), it is returned as-is and the
+    librosa pass is skipped.
+    """
+    if precomputed_onsets is not None:
+        return np.asarray(precomputed_onsets, dtype=float)
     try:
         return librosa.onset.onset_detect(
             y=audio, sr=sample_rate, hop_length=512, backtrack=False, units="time"
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
+import logging
+import math
 import time
 
 import numpy as np
@@ -12,10 +15,35 @@ import soundfile as sf
 from .onset_detector import RealtimeOnsetDetector
 from .metronome_detector import MetronomeDetector
 from .grid_aligner import GridConfig
-from .calibration import classify_onset
+from .calibration import (
+    WINDOW_SAMPLES,
+    CalibrationTemplates,
+    classify_onset,
+    new_feature_scratch,
+    spectral_fingerprint,
+)
 
 SESSIONS_DIR = Path(__file__).resolve().parent.parent / "sessions"
 
+logger = logging.getLogger(__name__)
+
+# Seconds of recent audio kept for spectral classification of new onsets.
+# Onsets are classified by the call that detects them, so the ring only has
+# to hold one processing block (it grows if a single chunk is longer).
+LOOKBACK_SECONDS = 0.2
+
+# Max seconds of backlogged audio that process_audio_batch handles in one
+# block; bounded by the lookback so every onset's window stays in the ring
+MAX_BATCH_SECONDS = LOOKBACK_SECONDS
+
+# Refits smaller than this leave the beat grid untouched. The BPM tolerance
+# stays tiny because a tempo error accumulates with every beat of the session.
+GRID_BPM_TOLERANCE = 1e-6
+GRID_REFERENCE_TOLERANCE_S = 1e-6
+
+# Max onset fingerprints remembered by the spectral classification cache
+SPECTRAL_CACHE_SIZE = 128
+
 
 @dataclass
 class NoteEvent:
@@ -28,6 +56,46 @@ class NoteEvent:
     beat_position: float
 
 
+# Real-time messages for the frontend. Slotted dataclasses are cheaper to
+# build than dicts; orjson serializes them (type field included) as JSON objects.
+
+@dataclass(slots=True)
+class ClickEvent:
+    time: float
+    click_count: int
+    total_onsets: int
+    type: str = field(default="click_detected", init=False)
+
+
+@dataclass(slots=True)
+class GridEstablishedEvent:
+    bpm: float
+    reference_time: float
+    type: str = field(default="grid_established", init=False)
+
+
+@dataclass(slots=True)
+class NoteEventMsg:
+    time: float
+    deviation_ms: float
+    bar: int
+    beat_position: float
+    is_on_time: bool
+    type: str = field(default="note_event", init=False)
+
+
+PipelineEvent = ClickEvent | GridEstablishedEvent | NoteEventMsg
+
+
+def _median(a: np.ndarray) -> float:
+    """Median by partial selection (np.partition) rather than a full sort."""
+    k = len(a) // 2
+    if len(a) % 2:
+        return float(np.partition(a, k)[k])
+    part = np.partition(a, (k - 1, k))
+    return (float(part[k - 1]) + float(part[k])) / 2
+
+
 class AudioPipeline:
     """Processes streaming audio: detects onsets, finds metronome by periodicity, scores guitar."""
 
@@ -42,10 +110,31 @@ class AudioPipeline:
         self.sample_rate = sample_rate
         self.timing_threshold_ms = timing_threshold_ms
         self.calibration = calibration
-
-        self.audio_buffer = np.array([], dtype=np.float32)
+        # Profiles parsed once for per-onset classification (None if incomplete)
+        self._cal_templates = CalibrationTemplates.from_calibration(calibration)
+
+        # Recent audio for onset classification, indexed by absolute sample
+        # position modulo capacity; _frames_written counts every sample seen
+        self._ring = np.zeros(int(LOOKBACK_SECONDS * sample_rate), dtype=np.float32)
+        self._frames_written = 0
+        # Reused padding buffer for per-onset spectral classification
+        self._classify_scratch = new_feature_scratch()
+        # Onset fingerprint -> spectral class, least recently used first
+        self._spec_cache: OrderedDict[bytes, str] = OrderedDict()
+        # Whole-session audio is streamed to a WAV file opened on the first chunk
+        self._wav: sf.SoundFile | None = None
+        self._wav_path: Path | None = None
         self.grid_config: GridConfig | None = None
         self.note_events: list[NoteEvent] = []
+        self._last_note_time = -math.inf
+        # Deviations of note_events (first _devs_n entries) and their running sums.
+        # Kept float64: the 0.1ms-rounded values go into the report verbatim.
+        self._devs = np.empty(1024)
+        self._devs_n = 0
+        self._dev_sum = 0.0
+        self._dev_sum_abs = 0.0
+        self._dev_sum_sq = 0.0
+        self._on_time_count = 0
 
         self.metronome_detector = MetronomeDetector()
 
@@ -55,11 +144,17 @@ class AudioPipeline:
         )
 
         self._total_onset_count = 0
+        # Per-onset handler for the current phase (pre-lock, then post-lock)
+        self._handle_onset = self._process_prelock
 
     @property
     def is_grid_established(self) -> bool:
         return self.metronome_detector.locked
 
+    @property
+    def total_samples(self) -> int:
+        return self._frames_written
+
     @property
     def bpm(self) -> float | None:
         return self.metronome_detector.bpm
@@ -69,143 +164,207 @@ class AudioPipeline:
         md = self.metronome_detector
         if self.grid_config is None or md.period is None or md.reference_time is None:
             return
-        if (self.grid_config.bpm != md.bpm
-                or self.grid_config.reference_time != md.reference_time):
-            self.grid_config = GridConfig(
-                bpm=md.bpm,
-                grid_resolution=self.grid_resolution,
-                reference_time=md.reference_time,
-            )
+        grid = self.grid_config
+        if (abs(grid.bpm - md.bpm) > GRID_BPM_TOLERANCE
+                or abs(grid.reference_time - md.reference_time) > GRID_REFERENCE_TOLERANCE_S):
+            grid.update(md.bpm, md.reference_time)
 
     def _classify_onset_spectral(self, onset_time: float) -> str:
         """Use calibration profiles to classify an onset as 'click' or 'guitar'."""
         if not self.calibration:
             return "unknown"
         onset_sample = int(onset_time * self.sample_rate)
-        return classify_onset(
-            self.audio_buffer, onset_sample, self.sample_rate, self.calibration
+        window = self.get_window(onset_sample, WINDOW_SAMPLES)
+        if window is None:
+            return "guitar"  # can't extract window, default to guitar
+        if self._cal_templates is None:
+            return "guitar"  # incomplete calibration
+
+        # Repetitive playing produces near-identical onsets; reuse their verdict
+        key = spectral_fingerprint(window)
+        cached = self._spec_cache.get(key)
+        if cached is not None:
+            self._spec_cache.move_to_end(key)
+            return cached
+
+        result = classify_onset(
+            window, 0, self.sample_rate, self._cal_templates, self._classify_scratch
         )
+        self._spec_cache[key] = result
+        if len(self._spec_cache) > SPECTRAL_CACHE_SIZE:
+            self._spec_cache.popitem(last=False)
+        return result
+
+    def _write_ring(self, chunk: np.ndarray) -> None:
+        """Append a chunk to the ring buffer, wrapping around its end."""
+        if len(chunk) > len(self._ring):
+            # Every slot is overwritten below, so the old contents can go
+            self._ring = np.zeros(len(chunk), dtype=np.float32)
+        capacity = len(self._ring)
+        start = self._frames_written
+        self._frames_written += len(chunk)
+
+        idx = start % capacity
+        first = min(len(chunk), capacity - idx)
+        np.copyto(self._ring[idx : idx + first], chunk[:first])
+        np.copyto(self._ring[: len(chunk) - first], chunk[first:])
+
+    def _write_wav(self, chunk: np.ndarray) -> None:
+        """Append a chunk to the session WAV file, opening it on first use."""
+        if self._wav is None:
+            if self._wav_path is not None:
+                return  # already saved
+            SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+            ts = time.strftime("%Y%m%d-%H%M%S")
+            self._wav_path = SESSIONS_DIR / f"session-{ts}.wav"
+            self._wav = sf.SoundFile(
+                str(self._wav_path), mode="w", samplerate=self.sample_rate,
+                channels=1, subtype="PCM_16",
+            )
+        self._wav.write(chunk)
+
+    def get_window(self, start_sample: int, n: int) -> np.ndarray | None:
+        """Return n samples starting at absolute sample start_sample.
 
-    def process_audio(self, chunk: np.ndarray) -> list[dict]:
-        """Process an incoming audio chunk. Returns event dicts for the frontend."""
-        self.audio_buffer = np.concatenate([self.audio_buffer, chunk])
+        Returns None if any part of the range is not in the ring buffer (not
+        yet received or already overwritten). The result is a view into the
+        ring unless the range wraps around its end.
+        """
+        capacity = len(self._ring)
+        end = start_sample + n
+        if start_sample < max(0, self._frames_written - capacity) or end > self._frames_written:
+            return None
+        idx = start_sample % capacity
+        if idx + n <= capacity:
+            return self._ring[idx : idx + n]
+        return np.concatenate((self._ring[idx:], self._ring[: idx + n - capacity]))
+
+    def process_audio_batch(self, chunks: list[np.ndarray]) -> list[PipelineEvent]:
+        """Process several backlogged chunks. Returns events for the frontend.
+
+        Consecutive chunks are joined into blocks of up to MAX_BATCH_SECONDS
+        so onset detection and the per-call setup run once per block rather
+        than once per chunk.
+        """
+        limit = int(MAX_BATCH_SECONDS * self.sample_rate)
+        events: list[PipelineEvent] = []
+        start = 0
+        while start < len(chunks):
+            end, size = start + 1, len(chunks[start])
+            while end < len(chunks) and size + len(chunks[end]) <= limit:
+                size += len(chunks[end])
+                end += 1
+            block = chunks[start] if end == start + 1 else np.concatenate(chunks[start:end])
+            events += self.process_audio(block)
+            start = end
+        return events
+
+    def process_audio(self, chunk: np.ndarray) -> list[PipelineEvent]:
+        """Process an incoming audio chunk. Returns events for the frontend."""
+        self._write_ring(chunk)
+        self._write_wav(chunk)
         onsets = self.onset_detector.process_chunk(chunk)
-        events: list[dict] = []
+        events: list[PipelineEvent] = []
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         for onset_time in onsets:
             self._total_onset_count += 1
-            print(f"[Pipeline] onset #{self._total_onset_count} at t={onset_time:.3f}s (grid_locked={self.is_grid_established})")
-
-            if not self.is_grid_established:
-                # Pre-lock: feed ALL onsets to periodicity detector
-                just_locked = self.metronome_detector.add_onset(onset_time)
-                events.append({
-                    "type": "click_detected",
-                    "time": onset_time,
-                    "click_count": self.metronome_detector.click_count,
-                    "total_onsets": self.metronome_detector.total_onsets,
-                })
-                if just_locked:
-                    self.grid_config = GridConfig(
-                        bpm=self.metronome_detector.bpm,
-                        grid_resolution=self.grid_resolution,
-                        reference_time=self.metronome_detector.reference_time,
-                    )
-                    events.append({
-                        "type": "grid_established",
-                        "bpm": round(self.metronome_detector.bpm, 1),
-                        "reference_time": self.metronome_detector.reference_time,
-                    })
-            else:
-                # Post-lock: classify using both timing and spectral analysis
-                timing_is_click = self.metronome_detector.track_onset(onset_time)
-
-                # If we have calibration data, also check spectral similarity
-                if self.calibration:
-                    spectral_class = self._classify_onset_spectral(onset_time)
-
-                    if timing_is_click and spectral_class == "guitar":
-                        # Timing says click but spectrum says guitar — trust spectrum,
-                        # undo the click tracking
-                        self.metronome_detector.click_times.pop()
-                        self.metronome_detector._click_indices.pop()
-                        self.metronome_detector._clicks_since_refit = max(
-                            0, self.metronome_detector._clicks_since_refit - 1
-                        )
-                        is_click = False
-                        print(f"[Pipeline] spectral override: timing=click, spectral=guitar → guitar")
-                    elif not timing_is_click and spectral_class == "click":
-                        # Spectrum says click but timing doesn't match — trust timing
-                        # (this prevents misclassifying guitar notes near grid lines)
-                        is_click = False
-                    else:
-                        is_click = timing_is_click
-                else:
-                    is_click = timing_is_click
-
-                # Update grid config if the detector refined period/reference
-                self._sync_grid()
-
-                if is_click:
-                    # When a click is detected, also check if a guitar note is
-                    # coinciding with it. When playing on the beat, the guitar
-                    # and metronome merge into a single onset — we should emit
-                    # both a click and a note event so neither gets lost.
-                    events.append({
-                        "type": "click_detected",
-                        "time": onset_time,
-                        "click_count": self.metronome_detector.click_count,
-                        "total_onsets": self._total_onset_count,
-                    })
-                    if self._is_note_expected_near(onset_time):
-                        deviation_ms, grid_time, bar, beat_pos = (
-                            self.grid_config.compute_deviation(onset_time)
-                        )
-                        note = NoteEvent(
-                            time_seconds=onset_time,
-                            nearest_grid_time=grid_time,
-                            deviation_ms=deviation_ms,
-                            event_type="note",
-                            pitch=None,
-                            bar=bar,
-                            beat_position=beat_pos,
-                        )
-                        self.note_events.append(note)
-                        events.append({
-                            "type": "note_event",
-                            "time": onset_time,
-                            "deviation_ms": deviation_ms,
-                            "bar": bar,
-                            "beat_position": beat_pos,
-                            "is_on_time": abs(deviation_ms) <= self.timing_threshold_ms,
-                        })
-                        print(f"[Pipeline] coincidence: click+note at t={onset_time:.3f}s")
-                else:
-                    # Guitar onset — score against grid
-                    deviation_ms, grid_time, bar, beat_pos = (
-                        self.grid_config.compute_deviation(onset_time)
-                    )
-                    note = NoteEvent(
-                        time_seconds=onset_time,
-                        nearest_grid_time=grid_time,
-                        deviation_ms=deviation_ms,
-                        event_type="note",
-                        pitch=None,
-                        bar=bar,
-                        beat_position=beat_pos,
-                    )
-                    self.note_events.append(note)
-                    events.append({
-                        "type": "note_event",
-                        "time": onset_time,
-                        "deviation_ms": deviation_ms,
-                        "bar": bar,
-                        "beat_position": beat_pos,
-                        "is_on_time": abs(deviation_ms) <= self.timing_threshold_ms,
-                    })
+            if debug:
+                logger.debug(
+                    "onset #%d at t=%.3fs (grid_locked=%s)",
+                    self._total_onset_count, onset_time, self.is_grid_established,
+                )
+            self._handle_onset(onset_time, events)
 
         return events
 
+    def _process_prelock(self, onset_time: float, events: list[PipelineEvent]) -> None:
+        """Pre-lock: feed ALL onsets to the periodicity detector."""
+        md = self.metronome_detector
+        just_locked = md.add_onset(onset_time)
+        events.append(ClickEvent(onset_time, md.click_count, md.total_onsets))
+        if just_locked:
+            self.grid_config = GridConfig(
+                bpm=md.bpm,
+                grid_resolution=self.grid_resolution,
+                reference_time=md.reference_time,
+            )
+            events.append(GridEstablishedEvent(round(md.bpm, 1), md.reference_time))
+            # Calibration is fixed for the session, so pick the post-lock path once
+            self._handle_onset = (
+                self._process_locked_cal if self.calibration else self._process_locked_nocal
+            )
+
+    def _process_locked_nocal(self, onset_time: float, events: list[PipelineEvent]) -> None:
+        """Post-lock without calibration: classify by grid timing alone."""
+        is_click = self.metronome_detector.track_onset(onset_time)
+        self._sync_grid()
+        self._emit_locked(onset_time, is_click, events)
+
+    def _process_locked_cal(self, onset_time: float, events: list[PipelineEvent]) -> None:
+        """Post-lock with calibration: classify by grid timing, checked against the spectrum."""
+        md = self.metronome_detector
+        is_click = md.track_onset(onset_time)
+
+        # Only a timing click needs the spectral check: if the spectrum says
+        # click but timing doesn't match, timing wins (this prevents
+        # misclassifying guitar notes near grid lines)
+        if is_click and self._classify_onset_spectral(onset_time) == "guitar":
+            # Timing says click but spectrum says guitar — trust spectrum,
+            # undo the click tracking
+            md.undo_last_click()
+            is_click = False
+            logger.debug("spectral override: timing=click, spectral=guitar → guitar")
+
+        self._sync_grid()
+        self._emit_locked(onset_time, is_click, events)
+
+    def _emit_locked(self, onset_time: float, is_click: bool, events: list[PipelineEvent]) -> None:
+        """Emit the events for a classified post-lock onset."""
+        if is_click:
+            # When a click is detected, also check if a guitar note is
+            # coinciding with it. When playing on the beat, the guitar
+            # and metronome merge into a single onset — we should emit
+            # both a click and a note event so neither gets lost.
+            events.append(
+                ClickEvent(onset_time, self.metronome_detector.click_count, self._total_onset_count)
+            )
+            if self._is_note_expected_near(onset_time):
+                events.append(self._record_note(onset_time))
+                logger.debug("coincidence: click+note at t=%.3fs", onset_time)
+        else:
+            # Guitar onset — score against grid
+            events.append(self._record_note(onset_time))
+
+    def _record_note(self, onset_time: float) -> NoteEventMsg:
+        """Score a note onset against the grid, record it, and return its event."""
+        deviation_ms, grid_time, bar, beat_pos = self.grid_config.compute_deviation(onset_time)
+        self.note_events.append(NoteEvent(
+            time_seconds=onset_time,
+            nearest_grid_time=grid_time,
+            deviation_ms=deviation_ms,
+            event_type="note",
+            pitch=None,
+            bar=bar,
+            beat_position=beat_pos,
+        ))
+        self._last_note_time = onset_time
+
+        # Rolling deviation storage and sums for the report
+        n = self._devs_n
+        if n == len(self._devs):
+            self._devs = np.resize(self._devs, 2 * n)
+        self._devs[n] = deviation_ms
+        self._devs_n = n + 1
+        abs_dev = abs(deviation_ms)
+        is_on_time = abs_dev <= self.timing_threshold_ms
+        self._dev_sum += deviation_ms
+        self._dev_sum_abs += abs_dev
+        self._dev_sum_sq += deviation_ms * deviation_ms
+        self._on_time_count += is_on_time
+
+        return NoteEventMsg(onset_time, deviation_ms, bar, beat_pos, is_on_time)
+
     def _is_note_expected_near(self, onset_time: float) -> bool:
         """Heuristic: should we also emit a note event for this click-classified onset?
 
@@ -214,32 +373,36 @@ class AudioPipeline:
         We check that note events have started arriving (the player is actively
         playing) and that the click didn't arrive during a gap between notes.
         """
-        if not self.note_events:
+        if self._last_note_time == -math.inf:
             # No notes yet — player hasn't started; this is a pure click
             return False
 
-        last_note_time = self.note_events[-1].time_seconds
-        md = self.metronome_detector
         # If we've heard a note recently (within 2 beat periods), the player
         # is active and this click likely coincides with a played note
-        return (onset_time - last_note_time) < md.period * 2.0
+        return (onset_time - self._last_note_time) < self.metronome_detector.period * 2.0
 
     def save_session(self) -> str | None:
-        """Save raw audio buffer to a WAV file for offline analysis. Returns the file path."""
-        if len(self.audio_buffer) == 0:
+        """Finish the session WAV file written during processing. Returns the file path.
+
+        Audio is streamed to disk as it arrives, so this only closes the file.
+        Safe to call more than once.
+        """
+        if self._wav_path is None:
             return None
-        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
-        ts = time.strftime("%Y%m%d-%H%M%S")
-        path = SESSIONS_DIR / f"session-{ts}.wav"
-        sf.write(str(path), self.audio_buffer, self.sample_rate)
-        print(f"[Pipeline] Session audio saved: {path} ({len(self.audio_buffer)} samples, {len(self.audio_buffer)/self.sample_rate:.1f}s)")
-        return str(path)
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+            print(f"[Pipeline] Session audio saved: {self._wav_path} ({self._frames_written} samples, {self._frames_written/self.sample_rate:.1f}s)")
+        return str(self._wav_path)
 
     def generate_report(self) -> dict:
-        """Produce session report from real-time classified events."""
+        """Produce session report from real-time classified events.
+
+        Statistics are sent unrounded; the frontend rounds them for display.
+        """
         self.save_session()
 
-        if len(self.audio_buffer) == 0:
+        if self._frames_written == 0:
             return {"type": "session_report", "error": "No audio recorded"}
 
         if not self.is_grid_established:
@@ -258,12 +421,8 @@ class AudioPipeline:
         if len(self.note_events) == 0:
             return {"type": "session_report", "error": "No guitar notes detected"}
 
-        events: list[dict] = []
-        deviations: list[float] = []
-
-        for note in self.note_events:
-            deviations.append(note.deviation_ms)
-            events.append({
+        events: list[dict] = [
+            {
                 "time": note.time_seconds,
                 "nearest_grid_time": note.nearest_grid_time,
                 "deviation_ms": note.deviation_ms,
@@ -271,11 +430,14 @@ class AudioPipeline:
                 "pitch": note.pitch,
                 "bar": note.bar,
                 "beat_position": note.beat_position,
-            })
-
-        abs_devs = [abs(d) for d in deviations]
-        worst_idx = int(np.argmax(abs_devs))
-        on_time = sum(1 for d in abs_devs if d <= self.timing_threshold_ms)
+            }
+            for note in self.note_events
+        ]
+        n = self._devs_n
+        deviations = self._devs[:n]
+        worst_idx = int(np.abs(deviations).argmax())
+        mean_dev = self._dev_sum / n
+        std_dev = math.sqrt(max(0.0, self._dev_sum_sq / n - mean_dev * mean_dev))
 
         return {
             "type": "session_report",
@@ -285,17 +447,17 @@ class AudioPipeline:
             "events": events,
             "click_times": self.metronome_detector.click_times,
             "stats": {
-                "total_notes": len(events),
-                "mean_absolute_deviation_ms": round(float(np.mean(np.abs(deviations))), 1),
-                "mean_signed_deviation_ms": round(float(np.mean(deviations)), 1),
-                "std_deviation_ms": round(float(np.std(deviations)), 1),
-                "median_deviation_ms": round(float(np.median(deviations)), 1),
-                "worst_deviation_ms": deviations[worst_idx],
+                "total_notes": n,
+                "mean_absolute_deviation_ms": self._dev_sum_abs / n,
+                "mean_signed_deviation_ms": mean_dev,
+                "std_deviation_ms": std_dev,
+                "median_deviation_ms": _median(deviations),
+                "worst_deviation_ms": self.note_events[worst_idx].deviation_ms,
                 "worst_deviation_position": (
                     f"bar {events[worst_idx]['bar']}, "
                     f"beat {events[worst_idx]['beat_position']}"
                 ),
-                "accuracy_percent": round(on_time / len(events) * 100, 1),
+                "accuracy_percent": self._on_time_count / n * 100,
             },
             "metronome_stats": self._compute_metronome_stats(),
         }
@@ -308,38 +470,48 @@ class AudioPipeline:
         which is more robust to any misclassified onsets.
         """
         md = self.metronome_detector
-        click_times = md.click_times
-        click_indices = md._click_indices
-        if len(click_times) < 3 or md.period is None or md.reference_time is None:
-            return {"total_clicks": len(click_times), "error": "Too few clicks for analysis"}
+        n = md._click_n
+        if n < 3 or md.period is None or md.reference_time is None:
+            return {"total_clicks": n, "error": "Too few clicks for analysis"}
 
-        times = np.array(click_times)
-        indices = np.array(click_indices, dtype=float)
+        # Views of the detector's click storage; no list conversion needed
+        times = md.click_times
+        indices = md._click_indices
         expected_ms = md.period * 1000.0
 
-        # Per-click deviation from fitted grid: actual - (reference + index * period)
-        expected_times = md.reference_time + indices * md.period
-        errors_ms = (times - expected_times) * 1000.0
+        # Per-click deviation from fitted grid: actual - (reference + index * period).
+        # Absolute times need float64 (float32 resolves only ~0.25ms an hour
+        # in); the millisecond residuals and everything after fit in float32.
+        errors_s = times - (md.reference_time + indices * md.period)
+        errors_ms = (errors_s * 1000.0).astype(np.float32)
         abs_errors = np.abs(errors_ms)
 
+        # Centered errors serve both the jitter and the drift slope
+        mean_err = errors_ms.sum() / n
+        centered_err = errors_ms - mean_err
+        jitter_ms = np.sqrt((centered_err @ centered_err) / n)
+
         # Drift: refit with slope to see if clicks are progressively early/late
         # A positive slope means the metronome is running slower than the fitted period
         drift_ms_per_beat = 0.0
-        if len(times) >= 4:
-            coeffs = np.polyfit(indices, errors_ms, 1)
-            drift_ms_per_beat = round(float(coeffs[0]), 2)
+        if n >= 4:
+            centered_idx = indices.astype(np.float32)
+            centered_idx -= centered_idx.sum() / n
+            spread = centered_idx @ centered_idx
+            if spread > 0:
+                drift_ms_per_beat = (centered_idx @ centered_err) / spread
 
         # Consistency: percentage of clicks within thresholds of their expected position
-        tight_count = int(np.sum(abs_errors <= 2.0))
-        ok_count = int(np.sum(abs_errors <= 5.0))
+        tight_count = np.count_nonzero(abs_errors <= 2.0)
+        ok_count = np.count_nonzero(abs_errors <= 5.0)
 
         return {
-            "total_clicks": len(click_times),
-            "expected_interval_ms": round(expected_ms, 1),
-            "jitter_ms": round(float(np.std(errors_ms)), 2),
-            "mean_error_ms": round(float(np.mean(abs_errors)), 2),
-            "max_error_ms": round(float(np.max(abs_errors)), 1),
+            "total_clicks": n,
+            "expected_interval_ms": expected_ms,
+            "jitter_ms": jitter_ms,
+            "mean_error_ms": abs_errors.sum() / n,
+            "max_error_ms": abs_errors.max(),
             "drift_ms_per_beat": drift_ms_per_beat,
-            "tight_percent": round(tight_count / len(click_times) * 100, 1),
-            "ok_percent": round(ok_count / len(click_times) * 100, 1),
+            "tight_percent": tight_count / n * 100,
+            "ok_percent": ok_count / n * 100,
         }
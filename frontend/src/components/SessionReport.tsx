@@ -4,7 +4,7 @@ import type {
   NoteEvent,
   MetronomeStats,
 } from "../types/session";
-import { deviationColor } from "../utils/timing";
+import { deviationColor, roundStat } from "../utils/timing";
 import { saveSession } from "../utils/saveSession";
 import { AudioPlayback } from "./AudioPlayback";
 import { NotationDisplay } from "./NotationDisplay";
@@ -42,6 +42,9 @@ export function SessionReport({ report, onNewSession, recordedAudio, sampleRate
     );
   }
 
+  // Compare the values as displayed so labels agree with the numbers shown
+  const meanSigned = roundStat(stats.mean_signed_deviation_ms);
+
   return (
     <div className="report">
       <h2>Session Report</h2>
@@ -50,21 +53,21 @@ export function SessionReport({ report, onNewSession, recordedAudio, sampleRate
         <span>BPM: {report.bpm}</span>
         <span>Grid: {report.grid_resolution} notes</span>
         <span>Bars: {report.total_bars}</span>
-        <span>Accuracy: {stats.accuracy_percent}%</span>
+        <span>Accuracy: {roundStat(stats.accuracy_percent)}%</span>
       </div>
 
       <div className="report-stats">
         <div>Notes played: {stats.total_notes}</div>
         <div>
-          Mean deviation: {stats.mean_absolute_deviation_ms}ms
-          {stats.mean_signed_deviation_ms > 2
-            ? ` (tends ${stats.mean_signed_deviation_ms}ms late)`
-            : stats.mean_signed_deviation_ms < -2
-              ? ` (tends ${Math.abs(stats.mean_signed_deviation_ms)}ms early)`
+          Mean deviation: {roundStat(stats.mean_absolute_deviation_ms)}ms
+          {meanSigned > 2
+            ? ` (tends ${meanSigned}ms late)`
+            : meanSigned < -2
+              ? ` (tends ${Math.abs(meanSigned)}ms early)`
               : ""}
         </div>
-        <div>Std deviation: {stats.std_deviation_ms}ms</div>
-        <div>Median: {stats.median_deviation_ms}ms</div>
+        <div>Std deviation: {roundStat(stats.std_deviation_ms)}ms</div>
+        <div>Median: {roundStat(stats.median_deviation_ms)}ms</div>
         <div>
           Worst: {stats.worst_deviation_ms > 0 ? "+" : ""}
           {stats.worst_deviation_ms}ms at {stats.worst_deviation_position}
@@ -168,13 +171,11 @@ function metronomeGrade(jitter: number): { label: string; color: string } {
 }
 
 function MetronomeQuality({ stats }: { stats: MetronomeStats }) {
-  const grade = metronomeGrade(stats.jitter_ms);
-  const driftDir =
-    stats.drift_ms_per_beat > 0.5
-      ? "slowing down"
-      : stats.drift_ms_per_beat < -0.5
-        ? "speeding up"
-        : "steady";
+  // Grade and label the values as displayed
+  const jitter = roundStat(stats.jitter_ms, 2);
+  const drift = roundStat(stats.drift_ms_per_beat, 2);
+  const grade = metronomeGrade(jitter);
+  const driftDir = drift > 0.5 ? "slowing down" : drift < -0.5 ? "speeding up" : "steady";
 
   return (
     <details className="metronome-details" open>
@@ -184,14 +185,14 @@ function MetronomeQuality({ stats }: { stats: MetronomeStats }) {
           {grade.label}
         </div>
         <div>Clicks detected: {stats.total_clicks}</div>
-        <div>Jitter: {stats.jitter_ms}ms (std dev of intervals)</div>
-        <div>Avg error per click: {stats.mean_error_ms}ms</div>
-        <div>Worst click: {stats.max_error_ms}ms off</div>
+        <div>Jitter: {jitter}ms (std dev of intervals)</div>
+        <div>Avg error per click: {roundStat(stats.mean_error_ms, 2)}ms</div>
+        <div>Worst click: {roundStat(stats.max_error_ms)}ms off</div>
         <div>
-          Drift: {Math.abs(stats.drift_ms_per_beat)}ms/beat ({driftDir})
+          Drift: {Math.abs(drift)}ms/beat ({driftDir})
         </div>
-        <div>Intervals within 2ms: {stats.tight_percent}%</div>
-        <div>Intervals within 5ms: {stats.ok_percent}%</div>
+        <div>Intervals within 2ms: {roundStat(stats.tight_percent)}%</div>
+        <div>Intervals within 5ms: {roundStat(stats.ok_percent)}%</div>
       </div>
     </details>
   );
@@ -26,7 +26,13 @@ export function useWebSocket(onMessage: (msg: ServerMessage) => void) {
 
       ws.onmessage = (event) => {
         if (typeof event.data === "string") {
-          onMessageRef.current(JSON.parse(event.data) as ServerMessage);
+          // The server batches events from one audio chunk into an array
+          const data = JSON.parse(event.data) as ServerMessage | ServerMessage[];
+          if (Array.isArray(data)) {
+            data.forEach((msg) => onMessageRef.current(msg));
+          } else {
+            onMessageRef.current(data);
+          }
         }
       };
 
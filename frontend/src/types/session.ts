@@ -55,6 +55,8 @@ export interface ServerMessage {
 
 export interface SourceProfile {
   mfcc_mean: number[];
+  mfcc_mean_unit?: number[];
+  mfcc_mean_q8?: number[];
   spectral_centroid: number;
   energy_decay: number;
   onset_count: number;
@@ -1,4 +1,5 @@
 import type { SessionReport, NoteEvent } from "../types/session";
+import { roundStat } from "./timing";
 
 /** Encode a Float32Array as a 16-bit mono PCM WAV blob. */
 function encodeWav(samples: Float32Array, sampleRate: number): Blob {
@@ -55,11 +56,11 @@ function buildLogText(report: SessionReport, filename: string): string {
     ``,
     `=== Statistics ===`,
     `Notes played:   ${report.stats.total_notes}`,
-    `Accuracy:       ${report.stats.accuracy_percent}%`,
-    `Mean deviation: ${report.stats.mean_absolute_deviation_ms}ms (absolute)`,
-    `Signed mean:    ${report.stats.mean_signed_deviation_ms}ms`,
-    `Std deviation:  ${report.stats.std_deviation_ms}ms`,
-    `Median:         ${report.stats.median_deviation_ms}ms`,
+    `Accuracy:       ${roundStat(report.stats.accuracy_percent)}%`,
+    `Mean deviation: ${roundStat(report.stats.mean_absolute_deviation_ms)}ms (absolute)`,
+    `Signed mean:    ${roundStat(report.stats.mean_signed_deviation_ms)}ms`,
+    `Std deviation:  ${roundStat(report.stats.std_deviation_ms)}ms`,
+    `Median:         ${roundStat(report.stats.median_deviation_ms)}ms`,
     `Worst:          ${report.stats.worst_deviation_ms}ms at ${report.stats.worst_deviation_position}`,
     ``,
   ];
@@ -69,13 +70,13 @@ function buildLogText(report: SessionReport, filename: string): string {
     lines.push(
       `=== Metronome Quality ===`,
       `Clicks detected: ${ms.total_clicks}`,
-      `Expected interval: ${ms.expected_interval_ms}ms`,
-      `Jitter (std):   ${ms.jitter_ms}ms`,
-      `Avg error:      ${ms.mean_error_ms}ms`,
-      `Worst click:    ${ms.max_error_ms}ms off`,
-      `Drift:          ${ms.drift_ms_per_beat}ms/beat`,
-      `Within 2ms:     ${ms.tight_percent}%`,
-      `Within 5ms:     ${ms.ok_percent}%`,
+      `Expected interval: ${roundStat(ms.expected_interval_ms)}ms`,
+      `Jitter (std):   ${roundStat(ms.jitter_ms, 2)}ms`,
+      `Avg error:      ${roundStat(ms.mean_error_ms, 2)}ms`,
+      `Worst click:    ${roundStat(ms.max_error_ms)}ms off`,
+      `Drift:          ${roundStat(ms.drift_ms_per_beat, 2)}ms/beat`,
+      `Within 2ms:     ${roundStat(ms.tight_percent)}%`,
+      `Within 5ms:     ${roundStat(ms.ok_percent)}%`,
       ``,
     );
   }
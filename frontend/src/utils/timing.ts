@@ -18,3 +18,11 @@ export function deviationHex(ms: number, threshold = 30): string {
   if (abs <= threshold) return "#fbbf24";
   return "#f87171";
 }
+
+/**
+ * Round a report statistic for display (the backend sends full precision).
+ */
+export function roundStat(value: number, digits = 1): number {
+  const scale = 10 ** digits;
+  return Math.round(value * scale) / scale;
+}